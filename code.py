@@ -1,25 +1,97 @@
 import os
+import sys
+import inspect
 import json
+import math
+import mmap
+import orjson
 from pathlib import Path
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, Optional
-from PyPDF2 import PdfReader
+from typing import ClassVar, Dict, NamedTuple, Optional, Tuple
 
 # ---------------- Storage ----------------
 BOOKS_DIR = Path("books")   # folder to store books
 INDEX_FILE = BOOKS_DIR / "index.json"
+JOURNAL_FILE = BOOKS_DIR / "index.jsonl"   # books added since the last compaction
+MMAP_THRESHOLD = 64 * 1024   # indexes at least this big are parsed straight from a mapping
 BOOKS_DIR.mkdir(exist_ok=True)
 
+def storable(value) -> bool:
+    """False for values orjson cannot write back faithfully: NaN/Infinity and ints beyond 64 bits."""
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, int):
+        return -2**63 <= value < 2**64
+    return True
+
+def parse_index(buf):
+    try:
+        return orjson.loads(buf)
+    except orjson.JSONDecodeError:
+        # Indexes written with stdlib json may hold NaN/Infinity, which orjson rejects
+        return json.loads(bytes(buf))
+
 def load_index():
     if INDEX_FILE.exists():
-        with open(INDEX_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(INDEX_FILE, "rb") as f:
+            if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+                return parse_index(f.read())
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                with memoryview(mm) as buf:
+                    return parse_index(buf)
+            finally:
+                mm.close()
     return {}
 
 def save_index(index):
-    with open(INDEX_FILE, "w", encoding="utf-8") as f:
-        json.dump(index, f, indent=4)
+    if all(storable(v) for data in index.values() for v in data["args"].values()):
+        payload = orjson.dumps(index, option=orjson.OPT_INDENT_2)
+    else:
+        # Legacy entries orjson would corrupt (NaN becomes null); keep them as stdlib json wrote them
+        payload = json.dumps(index, indent=2, ensure_ascii=False).encode("utf-8")
+    # Write a sibling file and swap it in, so a crash never leaves a torn index
+    tmp = INDEX_FILE.with_suffix(".json.tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, INDEX_FILE)
+
+def load_journal():
+    """Return the {isbn: entry} records appended since the last compaction.
+
+    A last line without its newline is an append cut short by a crash; it is
+    dropped and truncated away so the next append starts on a clean line.
+    """
+    entries = {}
+    if JOURNAL_FILE.exists():
+        with open(JOURNAL_FILE, "r+b") as f:
+            end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    f.truncate(end)
+                    break
+                end += len(line)
+                if line.strip():
+                    entries.update(orjson.loads(line))
+    return entries
+
+def append_journal(isbn, entry):
+    line = orjson.dumps({isbn: entry}) + b"\n"   # encode first: a failure leaves no file behind
+    with open(JOURNAL_FILE, "ab") as f:
+        f.write(line)
+
+def intern_index(index):
+    """Intern ISBN keys and type tags so later lookups hit on identity."""
+    intern = sys.intern
+    for data in index.values():
+        data["type"] = intern(data["type"])
+    return {intern(isbn): data for isbn, data in index.items()}
+
+def compact_index(index):
+    """Fold the journal into index.json and start a fresh journal."""
+    save_index(index)
+    JOURNAL_FILE.unlink(missing_ok=True)
 
 
 # ---------------- Services ----------------
@@ -36,14 +108,73 @@ class MailService:
 
 
 # ---------------- Abstract Base Class ----------------
-class Book(ABC):
-    def __init__(self, isbn: str, title: str, author: str, year: int, price: float) -> None:
-        self._isbn = isbn
-        self._title = title
-        self._author = author
-        self._year = year
-        self._price = price
+BOOK_TYPES: Dict[str, type] = {}   # index.json "type" -> Book subclass
+
+
+class Field(NamedTuple):
+    """A constructor argument and the slot it is stored in."""
+    name: str               # parameter name, also the key in index.json "args"
+    slot: str
+    type: type
+    intern: bool = False    # store sys.intern(value) instead of value
+
+
+BOOK_FIELDS = (
+    Field("isbn", "_isbn", str, intern=True),
+    Field("title", "_title", str),
+    Field("author", "_author", str),
+    Field("year", "_year", int),
+    Field("price", "_price", float),
+)
+
+# buy() requirements, combined per book type in _buy_flags
+REQUIRES_EMAIL = 1
+MAX_QTY_1 = 2
+
+
+def _make_init(cls) -> None:
+    """Replace cls's declared __init__ with a flat one that stores each of cls._fields in its slot.
+
+    Built with exec, like dataclasses does, so construction is one frame with
+    no super().__init__ call. The declared __init__ only documents the
+    signature for readers and type checkers; it must match _fields exactly.
+    """
+    fields = cls._fields
+    if "__init__" not in cls.__dict__:
+        raise TypeError(f"{cls.__qualname__} declares _fields but no __init__ signature")
+    declared = [(p.name, p.annotation) for p in inspect.signature(cls.__init__).parameters.values()][1:]
+    if declared != [(f.name, f.type) for f in fields]:
+        raise TypeError(f"{cls.__qualname__}.__init__ signature does not match its _fields")
+    params = ", ".join(f"{f.name}: {f.type.__name__}" for f in fields)
+    lines = [f"def __init__(self, {params}) -> None:"]
+    lines += [f"    self.{f.slot} = {f'intern({f.name})' if f.intern else f.name}" for f in fields]
+    env = {"intern": sys.intern, **{f.type.__name__: f.type for f in fields}}
+    namespace = {}
+    exec("\n".join(lines), env, namespace)
+    init = namespace["__init__"]
+    init.__module__ = cls.__module__
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    cls.__init__ = init
 
+
+class Book(ABC):
+    __slots__ = tuple(f.slot for f in BOOK_FIELDS)
+
+    _type_tag: ClassVar[str]     # "type" recorded in index.json; defaults to the class name
+    _for_sale: ClassVar[bool] = True   # the one switch behind is_for_sale() and the status column
+    _status_str: ClassVar[str]         # status column shown by list_books; derived from _for_sale
+    _fields: ClassVar[Tuple[Field, ...]] = BOOK_FIELDS   # constructor args, in order
+    _buy_flags: ClassVar[int] = 0             # REQUIRES_EMAIL / MAX_QTY_1 checks for buy()
+    # _validate_buy messages; each type keeps its own wording, and a flag's
+    # message must be defined wherever that flag is set
+    _quantity_error: ClassVar[str] = "Quantum book store: Quantity must be positive."
+    _email_error: ClassVar[str]
+    _max_qty_error: ClassVar[str]
+
+    # Declared signature only: _make_init checks it against _fields and replaces it
+    def __init__(self, isbn: str, title: str, author: str, year: int, price: float) -> None: ...
+
+    # Read-only: QuantumBookStore caches each book's listing row on registration
     @property
     def isbn(self) -> str:
         return self._isbn
@@ -64,27 +195,64 @@ class Book(ABC):
     def price(self) -> float:
         return self._price
 
-    @abstractmethod
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # Tags are not inherited: a subclass without its own is stored under its class name
+        if "_type_tag" not in cls.__dict__:
+            cls._type_tag = cls.__name__
+        registered = BOOK_TYPES.setdefault(cls._type_tag, cls)
+        if registered is not cls:
+            raise TypeError(f"Book type tag {cls._type_tag!r} is already registered to {registered.__name__}")
+        if "_status_str" not in cls.__dict__:
+            cls._status_str = "For Sale ✅" if cls._for_sale else "Showcase 🔒"
+        if "_fields" in cls.__dict__:
+            _make_init(cls)
+
+    @classmethod
+    def from_args(cls, args: dict) -> "Book":
+        """Rebuild a book from the "args" of its index.json record."""
+        return cls(**args)
+
+    def to_index_entry(self) -> dict:
+        """Return the record persisted in index.json for this book."""
+        return {"type": self._type_tag, "args": self._args()}
+
+    def _args(self) -> dict:
+        """Constructor keyword arguments needed to rebuild this book."""
+        return {f.name: getattr(self, f.slot) for f in self._fields}
+
+    def _validate_buy(self, quantity: int, email: Optional[str]) -> None:
+        """Apply the checks selected by _buy_flags; raise ValueError on the first failure."""
+        flags = self._buy_flags
+        if quantity <= 0:
+            raise ValueError(self._quantity_error)
+        if flags & MAX_QTY_1 and quantity > 1:
+            raise ValueError(self._max_qty_error)
+        if flags & REQUIRES_EMAIL and not email:
+            raise ValueError(self._email_error)
+
     def is_for_sale(self) -> bool:
-        ...
+        return self._for_sale
 
     @abstractmethod
     def buy(self, quantity: int, email: Optional[str], address: Optional[str]) -> float:
         ...
 
 
+_make_init(Book)
+
+
 # ---------------- Concrete Book Types ----------------
 class PaperBook(Book):
-    def __init__(self, isbn: str, title: str, author: str, year: int, price: float, stock: int) -> None:
-        super().__init__(isbn, title, author, year, price)
-        self._stock = stock
+    _fields = BOOK_FIELDS + (Field("stock", "_stock", int),)
+    __slots__ = tuple(f.slot for f in _fields[len(BOOK_FIELDS):])
+    _type_tag = "PaperBook"
+    _quantity_error = "Quantum book store: You must enter a positive quantity"
 
-    def is_for_sale(self) -> bool:
-        return True
+    def __init__(self, isbn: str, title: str, author: str, year: int, price: float, stock: int) -> None: ...
 
     def buy(self, quantity: int, email: Optional[str], address: Optional[str]) -> float:
-        if quantity <= 0:
-            raise ValueError("Quantum book store: You must enter a positive quantity")
+        self._validate_buy(quantity, email)
         if self._stock < quantity:
             raise ValueError(f"Quantum book store: Not enough stock for ISBN: {self._isbn}")
 
@@ -96,51 +264,58 @@ class PaperBook(Book):
 
 
 class Ebook(Book):
-    def __init__(self, isbn: str, title: str, author: str, year: int, price: float, filetype: str) -> None:
-        super().__init__(isbn, title, author, year, price)
-        self._filetype = filetype
+    _fields = BOOK_FIELDS + (Field("filetype", "_filetype", str),)
+    __slots__ = tuple(f.slot for f in _fields[len(BOOK_FIELDS):])
+    _type_tag = "Ebook"
+    _buy_flags = REQUIRES_EMAIL | MAX_QTY_1
+    _quantity_error = "Quantum book store: Quantity must be at least 1."
+    _max_qty_error = "Quantum book store: EBooks can only be bought one at a time."
+    _email_error = "Quantum book store: Email required for Ebook delivery."
 
-    def is_for_sale(self) -> bool:
-        return True
+    def __init__(self, isbn: str, title: str, author: str, year: int, price: float, filetype: str) -> None: ...
 
     def buy(self, quantity: int, email: Optional[str], address: Optional[str]) -> float:
-        if quantity <= 0:
-            raise ValueError("Quantum book store: Quantity must be at least 1.")
-        if quantity > 1:
-            raise ValueError("Quantum book store: EBooks can only be bought one at a time.")
-        if not email:
-            raise ValueError("Quantum book store: Email required for Ebook delivery.")
-
+        self._validate_buy(quantity, email)
         MailService.send(email)
         print(f"Quantum book store: Emailing EBook {self._title} to {email}")
         return self._price
 
 
 class AudioBook(Book):
-    def __init__(self, isbn: str, title: str, author: str, year: int, price: float, format_: str) -> None:
-        super().__init__(isbn, title, author, year, price)
-        self._format = format_
+    _fields = BOOK_FIELDS + (Field("format_", "_format", str),)
+    __slots__ = tuple(f.slot for f in _fields[len(BOOK_FIELDS):])
+    _type_tag = "AudioBook"
+    _buy_flags = REQUIRES_EMAIL
+    _email_error = "Quantum book store: Email is required to send AudioBook."
 
-    def is_for_sale(self) -> bool:
-        return True
+    def __init__(self, isbn: str, title: str, author: str, year: int, price: float, format_: str) -> None: ...
 
     def buy(self, quantity: int, email: Optional[str], address: Optional[str]) -> float:
-        if quantity <= 0:
-            raise ValueError("Quantum book store: Quantity must be positive.")
-        if not email:
-            raise ValueError("Quantum book store: Email is required to send AudioBook.")
-
+        self._validate_buy(quantity, email)
         print(f"Quantum book store: Sending AudioBook {self._title} ({self._format}) to {email}")
         return self._price * quantity
 
 
 @dataclass
 class ShowcaseBook(Book):
+    __slots__ = ()
+    _type_tag = "ShowcaseBook"
+    _for_sale = False
+
     def __init__(self, isbn: str, title: str, author: str, year: int) -> None:
         super().__init__(isbn, title, author, year, price=0.0)
 
-    def is_for_sale(self) -> bool:
-        return False
+    @classmethod
+    def from_args(cls, args: dict) -> "Book":
+        # Older index files stored price for showcase books; drop it in place
+        # so a later compaction writes the cleaned record
+        args.pop("price", None)
+        return cls(**args)
+
+    def _args(self) -> dict:
+        args = super()._args()
+        del args["price"]   # always 0.0, not a constructor argument
+        return args
 
     def buy(self, quantity: int, email: Optional[str], address: Optional[str]) -> float:
         raise NotImplementedError("Quantum book store: Showcase books are not for sale.")
@@ -157,52 +332,51 @@ class ShowcaseBook(Book):
 class QuantumBookStore:
     def __init__(self) -> None:
         self._inventory: Dict[str, Book] = {}
+        self._listing: Dict[str, str] = {}   # isbn -> preformatted list_books row
         self._load_books()
 
+    def _register(self, book: Book) -> None:
+        """Put a book in the inventory and cache its (immutable) listing row."""
+        self._inventory[book.isbn] = book
+        self._listing[book.isbn] = (
+            f"- {book.title} by {book.author} ({book.year}) | ISBN: {book.isbn} | ${book.price:.2f} | {book._status_str}"
+        )
+
     def _load_books(self):
-        """Load previously stored books from index.json."""
+        """Load previously stored books from index.json and its journal."""
         index = load_index()
-        for isbn, data in index.items():
-            btype = data["type"]
-            if btype == "PaperBook":
-                self._inventory[isbn] = PaperBook(**data["args"])
-            elif btype == "Ebook":
-                self._inventory[isbn] = Ebook(**data["args"])
-            elif btype == "AudioBook":
-                self._inventory[isbn] = AudioBook(**data["args"])
-            elif btype == "ShowcaseBook":
-                self._inventory[isbn] = ShowcaseBook(**data["args"])
+        journal = load_journal()
+        index.update(journal)
+        index = intern_index(index)
+        # Hot loop on large indexes: bind lookups to locals once
+        register = self._register
+        lookup_type = BOOK_TYPES.get
+        for data in index.values():
+            book_type = lookup_type(data["type"])
+            if book_type is not None:
+                register(book_type.from_args(data["args"]))
+        if journal:
+            compact_index(index)
 
     def add_book(self, book: Book) -> None:
-        self._inventory[book.isbn] = book
+        entry = book.to_index_entry()
+        for name, value in entry["args"].items():
+            if not storable(value):
+                raise ValueError(f"Quantum book store: {name} must be a finite number within 64 bits, got {value!r}")
+
+        # Persist before registering, so a book that fails to save is never listed.
+        # The journal is folded into index.json on next start.
+        append_journal(book.isbn, entry)
+        self._register(book)
         print(f"Quantum book store: Book added -> {book.title}")
 
-        # Save to index.json
-        index = load_index()
-        index[book.isbn] = {
-            "type": type(book).__name__,
-            "args": {
-                "isbn": book.isbn,
-                "title": book.title,
-                "author": book.author,
-                "year": book.year,
-                "price": book.price,
-                **({"stock": book._stock} if isinstance(book, PaperBook) else {}),
-                **({"filetype": book._filetype} if isinstance(book, Ebook) else {}),
-                **({"format_": book._format} if isinstance(book, AudioBook) else {}),
-            }
-        }
-        save_index(index)
-
     def list_books(self) -> None:
         if not self._inventory:
             print("📂 No books available in store.")
             return
 
-        print("\n📚 Books in Quantum Book Store:")
-        for isbn, book in self._inventory.items():
-            status = "For Sale ✅" if book.is_for_sale() else "Showcase 🔒"
-            print(f"- {book.title} by {book.author} ({book.year}) | ISBN: {isbn} | ${book.price:.2f} | {status}")
+        lines = ["\n📚 Books in Quantum Book Store:", *self._listing.values()]
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def buy_book(self, isbn: str, quantity: int, email: Optional[str], address: Optional[str]) -> float:
         book = self._inventory.get(isbn)
@@ -220,61 +394,75 @@ class QuantumBookStore:
 
 
 # ---------------- Interactive CLI ----------------
+MENU = (
+    "\n📚 Quantum Book Store Menu:\n"
+    "1. Add PaperBook\n"
+    "2. Add Ebook\n"
+    "3. Add AudioBook\n"
+    "4. Add ShowcaseBook\n"
+    "5. Buy Book\n"
+    "6. List Books\n"
+    "7. Exit\n"
+    "Enter your choice: "
+)
+
+
+def ask(prompt: str) -> str:
+    """input() without readline overhead; raises EOFError like input() does."""
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
+
 def main():
     store = QuantumBookStore()
 
     while True:
-        print("\n📚 Quantum Book Store Menu:")
-        print("1. Add PaperBook")
-        print("2. Add Ebook")
-        print("3. Add AudioBook")
-        print("4. Add ShowcaseBook")
-        print("5. Buy Book")
-        print("6. List Books")
-        print("7. Exit")
-
-        choice = input("Enter your choice: ").strip()
+        choice = ask(MENU).strip()
 
         try:
             if choice == "1":
-                isbn = input("ISBN: ")
-                title = input("Title: ")
-                author = input("Author: ")
-                year = int(input("Year: "))
-                price = float(input("Price: "))
-                stock = int(input("Stock: "))
+                isbn = ask("ISBN: ")
+                title = ask("Title: ")
+                author = ask("Author: ")
+                year = int(ask("Year: "))
+                price = float(ask("Price: "))
+                stock = int(ask("Stock: "))
                 store.add_book(PaperBook(isbn, title, author, year, price, stock))
 
             elif choice == "2":
-                isbn = input("ISBN: ")
-                title = input("Title: ")
-                author = input("Author: ")
-                year = int(input("Year: "))
-                price = float(input("Price: "))
-                filetype = input("Filetype (pdf, epub, etc.): ")
+                isbn = ask("ISBN: ")
+                title = ask("Title: ")
+                author = ask("Author: ")
+                year = int(ask("Year: "))
+                price = float(ask("Price: "))
+                filetype = ask("Filetype (pdf, epub, etc.): ")
                 store.add_book(Ebook(isbn, title, author, year, price, filetype))
 
             elif choice == "3":
-                isbn = input("ISBN: ")
-                title = input("Title: ")
-                author = input("Author: ")
-                year = int(input("Year: "))
-                price = float(input("Price: "))
-                format_ = input("Format (mp3, wav, etc.): ")
+                isbn = ask("ISBN: ")
+                title = ask("Title: ")
+                author = ask("Author: ")
+                year = int(ask("Year: "))
+                price = float(ask("Price: "))
+                format_ = ask("Format (mp3, wav, etc.): ")
                 store.add_book(AudioBook(isbn, title, author, year, price, format_))
 
             elif choice == "4":
-                isbn = input("ISBN: ")
-                title = input("Title: ")
-                author = input("Author: ")
-                year = int(input("Year: "))
+                isbn = ask("ISBN: ")
+                title = ask("Title: ")
+                author = ask("Author: ")
+                year = int(ask("Year: "))
                 store.add_book(ShowcaseBook(isbn, title, author, year))
 
             elif choice == "5":
-                isbn = input("Enter ISBN to buy: ")
-                quantity = int(input("Quantity (0 if showcase): "))
-                email = input("Email (press Enter if not needed): ").strip() or None
-                address = input("Address (press Enter if not needed): ").strip() or None
+                isbn = ask("Enter ISBN to buy: ")
+                quantity = int(ask("Quantity (0 if showcase): "))
+                email = ask("Email (press Enter if not needed): ").strip() or None
+                address = ask("Address (press Enter if not needed): ").strip() or None
                 total = store.buy_book(isbn, quantity, email, address)
                 print(f"✅ Purchase successful. Total: ${total:.2f}")
 